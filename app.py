@@ -1,7 +1,7 @@
 """
 Sea Life Yacht School - Main Application
 """
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Flask, render_template, stream_template, request, redirect, url_for, flash, get_flashed_messages, session, jsonify, abort, make_response
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -10,6 +10,13 @@ from datetime import datetime, date
 from functools import wraps
 import os
 import json
+import threading
+import zlib
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'sealife-yacht-secret-key-2025'
@@ -22,6 +29,13 @@ app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max
 app.config['TG_CHANNEL'] = 'SEALIFE_yachting'  # Telegram channel for news/updates
 app.config['TG_CONTACT'] = 'SEALIFE_yachting'          # Telegram contact for direct messages/requests
 
+# Response compression / streaming
+app.config['COMPRESS_MIN_SIZE'] = 500      # bytes; smaller buffered bodies are sent uncompressed
+app.config['COMPRESS_LEVEL'] = 6           # gzip level, 1 (fast) - 9 (small)
+app.config['COMPRESS_BR_LEVEL'] = 5        # brotli quality, 0 (fast) - 11 (small)
+app.config['COMPRESS_MIMETYPES'] = {'text/html', 'text/css', 'text/plain', 'application/json', 'application/javascript', 'image/svg+xml'}
+app.config['STREAM_FLUSH_SIZE'] = 8192     # bytes collected before a streamed chunk is sent
+
 db = SQLAlchemy(app)
 login_manager = LoginManager(app)
 login_manager.login_view = 'admin_login'
@@ -31,6 +45,13 @@ ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def remove_files(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
 # ============== MODELS ==============
 
 class Admin(UserMixin, db.Model):
@@ -135,6 +156,134 @@ def inject_globals():
         'current_year': datetime.now().year
     }
 
+# ============== RESPONSE COMPRESSION ==============
+
+def stream_page(template_name, **context):
+    """Stream a page so <head> (font preloads, CSS) reaches the browser before the body is rendered"""
+    # The session cookie is sent before the body, so pop flashed messages now
+    # instead of letting base.html do it mid-stream.
+    get_flashed_messages(with_categories=True)
+    return stream_template(template_name, **context)
+
+def negotiate_encoding():
+    offered = ['br', 'gzip'] if brotli else ['gzip']
+    return request.accept_encodings.best_match(offered)
+
+def make_compressor(encoding):
+    """Return (compress, flush, finish) callables for the given content coding"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=app.config['COMPRESS_BR_LEVEL'])
+        return compressor.process, compressor.flush, compressor.finish
+    compressor = zlib.compressobj(app.config['COMPRESS_LEVEL'], zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+
+def iter_stream(chunks, encoding):
+    """Regroup a streamed body into larger chunks, compressing it when an encoding is given.
+
+    A chunk is sent once STREAM_FLUSH_SIZE bytes are collected or when </head>
+    has been rendered, so the browser can start fetching fonts and CSS early.
+    """
+    flush_size = app.config['STREAM_FLUSH_SIZE']
+    compress, flush, finish = make_compressor(encoding) if encoding else (None, None, None)
+    buffer, size = [], 0
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            buffer.append(chunk)
+            size += len(chunk)
+            if size >= flush_size or b'</head>' in chunk:
+                data = b''.join(buffer)
+                yield compress(data) + flush() if encoding else data
+                buffer, size = [], 0
+        data = b''.join(buffer)
+        if encoding:
+            yield compress(data) + finish()
+        elif data:
+            yield data
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+@app.after_request
+def compress_response(response):
+    if (response.direct_passthrough
+            or response.status_code < 200 or response.status_code in (204, 304)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in app.config['COMPRESS_MIMETYPES']):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding()
+    if response.is_streamed:
+        response.response = iter_stream(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+    elif encoding and response.content_length and response.content_length >= app.config['COMPRESS_MIN_SIZE']:
+        compress, _, finish = make_compressor(encoding)
+        response.set_data(compress(response.get_data()) + finish())
+    else:
+        return response
+
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+        # The body no longer matches byte-for-byte, so a strong validator
+        # set by caching/ETag code around the view becomes a weak one.
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+    return response
+
+# ============== BULK ADMIN HELPERS ==============
+
+def bulk_error(message):
+    """Abort with 400, as JSON for the fetch()-based admin actions"""
+    if request.is_json:
+        abort(make_response(jsonify({'success': False, 'error': message}), 400))
+    abort(400)
+
+def bulk_data():
+    data = request.get_json(silent=True)
+    if data is None:
+        return {'ids': request.form.getlist('ids'), 'before': request.form.get('before'), 'all': request.form.get('all')}
+    if not isinstance(data, dict):
+        bulk_error('Expected a JSON object')
+    return data
+
+def bulk_params():
+    """Read `ids` and an optional `before` date (YYYY-MM-DD) from a JSON body or form post"""
+    data = bulk_data()
+    ids = data.get('ids') or []
+    if not isinstance(ids, list):
+        bulk_error('`ids` must be a list')
+    try:
+        ids = [int(i) for i in ids]
+        before = datetime.strptime(data['before'], '%Y-%m-%d') if data.get('before') else None
+    except (TypeError, ValueError):
+        bulk_error('Invalid `ids` or `before`')
+    return ids, before
+
+def cleanup_uploads(filenames):
+    """Remove upload files no longer referenced by any row, off the request thread"""
+    filenames = {f for f in filenames if f}
+    for model in (Trip, BlogPost, GalleryItem):
+        if not filenames:
+            return
+        in_use = db.session.query(model.image).filter(model.image.in_(filenames)).all()
+        filenames -= {row.image for row in in_use}
+    if filenames:
+        paths = [os.path.join(app.config['UPLOAD_FOLDER'], f) for f in filenames]
+        threading.Thread(target=remove_files, args=(paths,), daemon=True).start()
+
+def bulk_delete(model, ids):
+    """Delete the given rows in a single DELETE/commit and clean up their uploads"""
+    if not ids:
+        return 0
+    images = [row.image for row in db.session.query(model.image).filter(model.id.in_(ids))]
+    deleted = model.query.filter(model.id.in_(ids)).delete(synchronize_session=False)
+    db.session.commit()
+    cleanup_uploads(images)
+    return deleted
+
 # ============== PUBLIC ROUTES ==============
 
 @app.route('/')
@@ -143,7 +292,7 @@ def home():
     trips = Trip.query.filter_by(is_active=True).order_by(Trip.start_date).limit(6).all()
     posts = BlogPost.query.filter_by(is_published=True).order_by(BlogPost.created_at.desc()).limit(3).all()
     gallery = GalleryItem.query.filter_by(is_featured=True).order_by(GalleryItem.order).limit(8).all()
-    return render_template('pages/home.html', trips=trips, posts=posts, gallery=gallery)
+    return stream_page('pages/home.html', trips=trips, posts=posts, gallery=gallery)
 
 @app.route('/about')
 def about():
@@ -156,7 +305,7 @@ def trips():
         trips = Trip.query.filter_by(is_active=True).order_by(Trip.start_date).all()
     else:
         trips = Trip.query.filter_by(is_active=True, trip_type=trip_type).order_by(Trip.start_date).all()
-    return render_template('pages/trips.html', trips=trips, current_type=trip_type)
+    return stream_page('pages/trips.html', trips=trips, current_type=trip_type)
 
 @app.route('/trip/<int:trip_id>')
 def trip_detail(trip_id):
@@ -172,7 +321,7 @@ def blog():
         posts = BlogPost.query.filter(BlogPost.is_published == True, BlogPost.tags.contains(tag)).order_by(BlogPost.created_at.desc()).paginate(page=page, per_page=9)
     else:
         posts = BlogPost.query.filter_by(is_published=True).order_by(BlogPost.created_at.desc()).paginate(page=page, per_page=9)
-    return render_template('pages/blog.html', posts=posts, current_tag=tag)
+    return stream_page('pages/blog.html', posts=posts, current_tag=tag)
 
 @app.route('/blog/<slug>')
 def blog_post(slug):
@@ -192,7 +341,7 @@ def gallery():
         items = GalleryItem.query.order_by(GalleryItem.order, GalleryItem.created_at.desc()).all()
     else:
         items = GalleryItem.query.filter_by(category=category).order_by(GalleryItem.order).all()
-    return render_template('pages/gallery.html', items=items, current_category=category)
+    return stream_page('pages/gallery.html', items=items, current_category=category)
 
 @app.route('/contact', methods=['GET', 'POST'])
 def contact():
@@ -343,9 +492,18 @@ def admin_trip_delete(trip_id):
     trip = Trip.query.get_or_404(trip_id)
     db.session.delete(trip)
     db.session.commit()
+    cleanup_uploads([trip.image])
     flash('Подорож видалено!', 'success')
     return redirect(url_for('admin_trips'))
 
+@app.route('/admin/trips/bulk-delete', methods=['POST'])
+@login_required
+def admin_trip_bulk_delete():
+    ids, _ = bulk_params()
+    deleted = bulk_delete(Trip, ids)
+    flash(f'Видалено подорожей: {deleted}', 'success')
+    return redirect(url_for('admin_trips'))
+
 # Admin - Blog
 @app.route('/admin/blog')
 @login_required
@@ -426,9 +584,18 @@ def admin_blog_delete(post_id):
     post = BlogPost.query.get_or_404(post_id)
     db.session.delete(post)
     db.session.commit()
+    cleanup_uploads([post.image])
     flash('Статтю видалено!', 'success')
     return redirect(url_for('admin_blog'))
 
+@app.route('/admin/blog/bulk-delete', methods=['POST'])
+@login_required
+def admin_blog_bulk_delete():
+    ids, _ = bulk_params()
+    deleted = bulk_delete(BlogPost, ids)
+    flash(f'Видалено статей: {deleted}', 'success')
+    return redirect(url_for('admin_blog'))
+
 # Admin - Gallery
 @app.route('/admin/gallery')
 @login_required
@@ -466,9 +633,38 @@ def admin_gallery_delete(item_id):
     item = GalleryItem.query.get_or_404(item_id)
     db.session.delete(item)
     db.session.commit()
+    cleanup_uploads([item.image])
     flash('Фото видалено!', 'success')
     return redirect(url_for('admin_gallery'))
 
+@app.route('/admin/gallery/bulk-delete', methods=['POST'])
+@login_required
+def admin_gallery_bulk_delete():
+    ids, _ = bulk_params()
+    deleted = bulk_delete(GalleryItem, ids)
+    flash(f'Видалено фото: {deleted}', 'success')
+    return redirect(url_for('admin_gallery'))
+
+@app.route('/admin/gallery/reorder', methods=['POST'])
+@login_required
+def admin_gallery_reorder():
+    # `ids` lists every item in its new position; one UPDATE ... CASE writes them all
+    ids, _ = bulk_params()
+    existing = {row.id for row in db.session.query(GalleryItem.id)}
+    if len(ids) != len(set(ids)) or set(ids) != existing:
+        bulk_error('`ids` must list every gallery item exactly once')
+    updated = 0
+    if ids:
+        positions = {item_id: position for position, item_id in enumerate(ids)}
+        result = db.session.execute(
+            db.update(GalleryItem)
+            .where(GalleryItem.id.in_(ids))
+            .values({GalleryItem.order: db.case(positions, value=GalleryItem.id)})
+        )
+        updated = result.rowcount
+        db.session.commit()
+    return jsonify({'success': True, 'updated': updated})
+
 # Admin - Contacts
 @app.route('/admin/contacts')
 @login_required
@@ -484,6 +680,37 @@ def admin_contact_mark_read(contact_id):
     db.session.commit()
     return jsonify({'success': True})
 
+@app.route('/admin/contacts/mark-read', methods=['POST'])
+@login_required
+def admin_contacts_mark_read():
+    # Marking every unread request needs an explicit `all`
+    ids, before = bulk_params()
+    if not ids and not before and bulk_data().get('all') not in (True, 'on', '1', 'true'):
+        bulk_error('Nothing selected')
+    query = ContactRequest.query.filter_by(is_read=False)
+    if ids:
+        query = query.filter(ContactRequest.id.in_(ids))
+    if before:
+        query = query.filter(ContactRequest.created_at < before)
+    updated = query.update({ContactRequest.is_read: True}, synchronize_session=False)
+    db.session.commit()
+    return jsonify({'success': True, 'updated': updated})
+
+@app.route('/admin/contacts/delete', methods=['POST'])
+@login_required
+def admin_contacts_delete():
+    ids, before = bulk_params()
+    if not ids and not before:
+        bulk_error('Nothing selected')
+    query = ContactRequest.query
+    if ids:
+        query = query.filter(ContactRequest.id.in_(ids))
+    if before:
+        query = query.filter(ContactRequest.created_at < before)
+    deleted = query.delete(synchronize_session=False)
+    db.session.commit()
+    return jsonify({'success': True, 'deleted': deleted})
+
 # ============== INIT ==============
 
 def init_db():
@@ -0,0 +1,57 @@
+"""
+Benchmark streamed/compressed page responses
+
+Compares render_template with stream_page, and identity with gzip and br,
+using the Flask test client against the local database:
+
+    python bench_responses.py [runs]
+
+TTFB is the time until the first body chunk is available; bytes is the
+sum of all chunks as they would go over the wire.
+"""
+import statistics
+import sys
+import time
+
+from flask import render_template
+
+import app as site
+
+PAGES = ['/', '/trips', '/blog', '/gallery']
+ENCODINGS = ['identity', 'gzip', 'br'] if site.brotli else ['identity', 'gzip']
+
+def measure(client, path, encoding, runs):
+    ttfb, total, size, first = [], [], 0, 0
+    for _ in range(runs):
+        start = time.perf_counter()
+        response = client.get(path, headers={'Accept-Encoding': encoding}, buffered=False)
+        chunks = iter(response.response)
+        chunk = next(chunks, b'')
+        ttfb.append(time.perf_counter() - start)
+        first = len(chunk)
+        size = len(chunk) + sum(len(c) for c in chunks)
+        total.append(time.perf_counter() - start)
+        response.close()
+    return statistics.median(ttfb) * 1000, statistics.median(total) * 1000, first, size
+
+def run(runs):
+    stream_page = site.stream_page
+    modes = {
+        'render': lambda template_name, **context: render_template(template_name, **context),
+        'stream': stream_page,
+    }
+    client = site.app.test_client()
+    print(f"{'page':10} {'mode':7} {'encoding':9} {'ttfb ms':>8} {'total ms':>9} {'1st chunk':>10} {'bytes':>7}")
+    try:
+        for path in PAGES:
+            for mode, view_renderer in modes.items():
+                # Views look stream_page up at call time, so swapping it switches the mode
+                site.stream_page = view_renderer
+                for encoding in ENCODINGS:
+                    ttfb, total, first, size = measure(client, path, encoding, runs)
+                    print(f"{path:10} {mode:7} {encoding:9} {ttfb:8.2f} {total:9.2f} {first:10} {size:7}")
+    finally:
+        site.stream_page = stream_page
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50)